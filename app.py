@@ -1,48 +1,104 @@
+import functools
 import os
 import re
 
+import numpy as np
 import pandas as pd
 import plotly.express as px
-from dash import Dash, dcc, html, Input, Output, State
+import pyarrow as pa
+from dash import Dash, Patch, dcc, html, Input, Output, State
 import dash_bootstrap_components as dbc
+from numba import njit
+
+from convert import ARROW_PATH, CSV_PATH, read_csv
 
 # ==========================
 # 1. LOAD DATA
 # ==========================
-# Use relative path for Railway deployment
-csv_path = "df_full_features.csv"
-if not os.path.exists(csv_path):
-    raise FileNotFoundError(f"CSV file not found: {csv_path}")
-
-df = pd.read_csv(csv_path)
+# Use relative paths for Railway deployment.
+# The Arrow file is produced from the CSV by convert.py. It is memory-mapped
+# and loaded once in the gunicorn master (--preload, see Procfile), so the
+# workers share its pages instead of each holding a private copy of df.
+if os.path.exists(ARROW_PATH):
+    df = pa.ipc.open_file(pa.memory_map(ARROW_PATH)).read_all().to_pandas(split_blocks=True)
+elif os.path.exists(CSV_PATH):
+    df = read_csv(CSV_PATH)
+else:
+    raise FileNotFoundError(f"Data file not found: {ARROW_PATH} or {CSV_PATH}")
+
+# Weekday as an int code (0 = Monday) for the heatmap
+WEEKDAY_ORDER = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+df["_WD_CODE"] = df["CRASH_WEEKDAY"].map({d: i for i, d in enumerate(WEEKDAY_ORDER)}).astype("int8")
+
+# Injury flags packed into one uint8 bitmask (see INJ_BIT)
+INJ_BIT = {"pedestrian": 1, "cyclist": 2, "motorist": 4}
+df["_INJ_FLAGS"] = (
+    df["HAS_PEDESTRIAN"].values.astype(np.uint8)
+    | (df["HAS_CYCLIST"].values.astype(np.uint8) << 1)
+    | (df["HAS_DRIVER"].values.astype(np.uint8) << 2)
+)
+for c in ["HAS_PEDESTRIAN", "HAS_CYCLIST", "HAS_DRIVER"]:
+    del df[c]  # in place: df.drop() would copy the memory-mapped columns
+INJ_FLAGS = df["_INJ_FLAGS"].values
 
-# Ensure datetime
+# Year-month as an int (e.g. 202203) for the monthly trend
 if "CRASH_DATETIME" in df.columns:
-    df["CRASH_DATETIME"] = pd.to_datetime(df["CRASH_DATETIME"], errors="coerce")
+    df["CRASH_YEAR_MONTH"] = (df["CRASH_DATETIME"].dt.year * 100 + df["CRASH_DATETIME"].dt.month).astype("int32")
 
 # Drop rows without coords for map
 df_map_base = df.dropna(subset=["LATITUDE", "LONGITUDE"])
 
+# Fixed lat/lon grid for the density map: crashes are binned
+# server-side, so the figure size depends on the grid, not on N
+MAP_BINS = 200
+MAP_LAT_EDGES = np.linspace(df_map_base["LATITUDE"].min(), df_map_base["LATITUDE"].max(), MAP_BINS + 1)
+MAP_LON_EDGES = np.linspace(df_map_base["LONGITUDE"].min(), df_map_base["LONGITUDE"].max(), MAP_BINS + 1)
+MAP_LAT_CENTERS = (MAP_LAT_EDGES[:-1] + MAP_LAT_EDGES[1:]) / 2
+MAP_LON_CENTERS = (MAP_LON_EDGES[:-1] + MAP_LON_EDGES[1:]) / 2
+
 # Useful lists for filters (exclude UNKNOWN)
-BOROUGHS = sorted([b for b in df["BOROUGH"].dropna().unique() if b != "UNKNOWN"])
+BOROUGHS = sorted([b for b in df["BOROUGH"].cat.categories if b != "UNKNOWN"])
 YEARS = sorted(df["CRASH_YEAR"].dropna().unique())
 
-# Vehicle types from all 5 columns
+# Vehicle types from all 5 columns (union of the category dictionaries,
+# no need to look at the rows themselves)
 veh_cols = [c for c in df.columns if c.startswith("VEHICLE TYPE CODE")]
-vehicle_types = (
-    pd.concat([df[c] for c in veh_cols])
-    .dropna()
-    .unique()
-)
-VEH_TYPES = sorted(vehicle_types)
+VEH_TYPES = sorted(set().union(*(df[c].cat.categories for c in veh_cols)))
+vehicle_types = pd.Index(VEH_TYPES)
 
 cf_cols = [c for c in df.columns if c.startswith("CONTRIBUTING FACTOR VEHICLE")]
-contrib_factors = (
-    pd.concat([df[c] for c in cf_cols])
-    .dropna()
-    .unique()
-)
-CONTRIB_FACTORS = sorted(contrib_factors)
+CONTRIB_FACTORS = sorted(set().union(*(df[c].cat.categories for c in cf_cols)))
+contrib_factors = pd.Index(CONTRIB_FACTORS)
+
+# Put the 5 columns of each group on one shared dictionary so their
+# category codes are comparable, and keep the codes as a 2-D array
+# (rows x 5) for the vehicle / factor filters
+for c in veh_cols:
+    df[c] = df[c].cat.set_categories(vehicle_types)
+for c in cf_cols:
+    df[c] = df[c].cat.set_categories(contrib_factors)
+VEH_CODES = np.column_stack([df[c].cat.codes.values for c in veh_cols])
+CF_CODES = np.column_stack([df[c].cat.codes.values for c in cf_cols])
+
+# Nothing writes to these after startup; read-only keeps the forked
+# workers from dirtying (and un-sharing) their pages by accident
+VEH_CODES.flags.writeable = False
+CF_CODES.flags.writeable = False
+
+# Sorted row positions per borough and per year, so the two most common
+# filters start from a short index list instead of scanning every row
+BORO_IDX = {b: np.flatnonzero(df["BOROUGH"].values == b) for b in BOROUGHS}
+YEAR_IDX = {int(y): np.flatnonzero(df["CRASH_YEAR"].values == y) for y in YEARS}
+for _idx in [*BORO_IDX.values(), *YEAR_IDX.values()]:
+    _idx.flags.writeable = False
+
+# Per-row borough / year codes, for lookup-table checks on candidate rows
+borough_categories = df["BOROUGH"].cat.categories
+year_index = pd.Index(YEARS)
+BORO_CODES = df["BOROUGH"].cat.codes.values
+YEAR_CODES = year_index.get_indexer(df["CRASH_YEAR"].values).astype(np.int8)
+BORO_CODES.flags.writeable = False
+YEAR_CODES.flags.writeable = False
 
 INJURY_TYPE_OPTIONS = [
     {"label": "Any", "value": "any"},
@@ -55,38 +111,55 @@ INJURY_TYPE_OPTIONS = [
 # 2. HELPER: PARSE SEARCH QUERY
 # ==========================
 
+# One pattern for the whole query: borough names (as in the data),
+# 4-digit years and injury keywords. Matched against the lowercased
+# query rather than with re.IGNORECASE, whose Unicode folding would let
+# e.g. 'ſ' match 's' and miss the lookups below.
+INJURY_KEYWORDS = {
+    "pedestrian": "pedestrian",
+    "cyclist": "cyclist",
+    "bicycle": "cyclist",
+    "bike": "cyclist",
+    "motorist": "motorist",
+    "driver": "motorist",
+}
+SEARCH_RE = re.compile(
+    r"(?P<boro>" + "|".join(re.escape(b.lower()) for b in BOROUGHS) + r")"
+    r"|\b(?P<year>20\d{2})\b"
+    r"|(?P<inj>" + "|".join(INJURY_KEYWORDS) + r")"
+)
+BOROUGH_BY_NAME = {b.lower(): b for b in BOROUGHS}
+
+
 def parse_search_query(text: str):
     """
     Parse queries like: 'Brooklyn 2022 pedestrian crashes'
     Returns dict with: boroughs, years, injury_type
-    
+
     FIXED: Borough names are uppercase in data (BROOKLYN, not Brooklyn)
     """
     if not text:
         return {"boroughs": None, "years": None, "injury_type": None}
 
-    text_low = text.lower()
+    found_boros = set()
+    year_matches = []
+    found_injuries = set()
+    for m in SEARCH_RE.finditer(text.lower()):
+        if m.lastgroup == "boro":
+            found_boros.add(BOROUGH_BY_NAME[m.group()])  # Keep as UPPERCASE
+        elif m.lastgroup == "year":
+            year_matches.append(int(m.group()))
+        else:
+            found_injuries.add(INJURY_KEYWORDS[m.group()])
 
-    # ---- Borough detection (convert to UPPERCASE to match data) ----
-    detected_boros = []
-    for b in BOROUGHS:
-        if b and b.lower() in text_low:
-            detected_boros.append(b)  # Keep as UPPERCASE
-    detected_boros = detected_boros if detected_boros else None
+    # ---- Borough detection (in BOROUGHS order) ----
+    detected_boros = [b for b in BOROUGHS if b in found_boros] or None
 
     # ---- Year detection (4-digit years 2000-2099) ----
-    year_matches = re.findall(r"\b(20\d{2})\b", text_low)
-    detected_years = [int(y) for y in year_matches if int(y) in YEARS]
-    detected_years = detected_years if detected_years else None
-
-    # ---- Injury type ----
-    injury = None
-    if "pedestrian" in text_low:
-        injury = "pedestrian"
-    elif "cyclist" in text_low or "bicycle" in text_low or "bike" in text_low:
-        injury = "cyclist"
-    elif "motorist" in text_low or "driver" in text_low:
-        injury = "motorist"
+    detected_years = [y for y in year_matches if y in YEARS] or None
+
+    # ---- Injury type (pedestrian > cyclist > motorist) ----
+    injury = next((t for t in ("pedestrian", "cyclist", "motorist") if t in found_injuries), None)
 
     return {
         "boroughs": detected_boros,
@@ -95,7 +168,121 @@ def parse_search_query(text: str):
     }
 
 # ==========================
-# 3. BUILD APP
+# 3. HELPER: FILTER ROWS
+# ==========================
+
+def _category_codes(categories: pd.Index, values) -> np.ndarray:
+    """Category codes of the selected values (unknown values are dropped)."""
+    codes = categories.get_indexer(values)
+    return codes[codes >= 0]
+
+
+def _category_counts(values: pd.Series) -> pd.Series:
+    """Counts of the observed categories, most frequent first."""
+    codes = values.cat.codes.values
+    counts = pd.Series(np.bincount(codes[codes >= 0], minlength=len(values.cat.categories)), index=values.cat.categories)
+    return counts[counts > 0].sort_values(ascending=False, kind="stable")
+
+
+def _code_lut(categories: pd.Index, values) -> np.ndarray:
+    """
+    Bool lookup table over category codes for the selected values.
+    The extra last slot is hit by code -1 (missing); with nothing
+    selected every slot is True, i.e. the filter lets every row through.
+    """
+    if not values:
+        return np.ones(len(categories) + 1, dtype=bool)
+    lut = np.zeros(len(categories) + 1, dtype=bool)
+    lut[_category_codes(categories, values)] = True
+    return lut
+
+
+@njit(cache=True)
+def _match_rows(rows, veh_codes, veh_lut, cf_codes, cf_lut, inj_flags, inj_bit):
+    """
+    Keep the rows (positions into df) whose vehicle types and contributing
+    factors hit their lookup tables in any of the 5 columns, and whose
+    injury flags contain inj_bit (0 = no injury filter). One pass, no
+    intermediate masks per filter. Serial on purpose: a parallel loop
+    gains nothing at this size, and numba's thread pool is not safe to
+    start in the gunicorn master before it forks (--preload).
+    """
+    keep = np.zeros(rows.size, dtype=np.bool_)
+    for k in range(rows.size):
+        i = rows[k]
+        if inj_bit != 0 and (inj_flags[i] & inj_bit) == 0:
+            continue
+        veh_hit = False
+        for j in range(veh_codes.shape[1]):
+            if veh_lut[veh_codes[i, j]]:  # code -1 wraps to the last slot
+                veh_hit = True
+                break
+        if not veh_hit:
+            continue
+        for j in range(cf_codes.shape[1]):
+            if cf_lut[cf_codes[i, j]]:
+                keep[k] = True
+                break
+    return rows[keep]
+
+
+@functools.lru_cache(maxsize=64)
+def _filter_indices(boroughs: tuple, years: tuple, vehicles: tuple, factors: tuple, injury: str) -> np.ndarray:
+    """
+    Return the row positions of df matching the given filters.
+    Arguments are tuples so the result can be cached: clicking
+    'Generate Report' again with the same selections skips the masks.
+    """
+    no_rows = np.empty(0, dtype=np.intp)
+
+    # Repeated selections (e.g. '2021 2021' in the search box) must not
+    # repeat their rows in the unions below
+    boroughs = tuple(dict.fromkeys(boroughs))
+    years = tuple(dict.fromkeys(int(y) for y in years))
+
+    # Borough / year: start from the precomputed row positions of the more
+    # selective one, then check the other through its code lookup table
+    selected = []
+    if boroughs:
+        rows = np.concatenate([BORO_IDX.get(b, no_rows) for b in boroughs])
+        selected.append((rows, BORO_CODES, _code_lut(borough_categories, boroughs)))
+    if years:
+        rows = np.concatenate([YEAR_IDX.get(y, no_rows) for y in years])
+        selected.append((rows, YEAR_CODES, _code_lut(year_index, years)))
+
+    if selected:
+        selected.sort(key=lambda sel: len(sel[0]))
+        idx = np.sort(selected[0][0])
+        for _, codes, lut in selected[1:]:
+            idx = idx[lut[codes[idx]]]  # code -1 wraps to the (False) last slot
+    else:
+        idx = np.arange(len(df))
+
+    # Vehicle type / contributing factor / injury: one compiled pass over
+    # the (already reduced) rows
+    if vehicles or factors or injury in INJ_BIT:
+        idx = _match_rows(
+            idx,
+            VEH_CODES,
+            _code_lut(vehicle_types, vehicles),
+            CF_CODES,
+            _code_lut(contrib_factors, factors),
+            INJ_FLAGS,
+            INJ_BIT.get(injury, 0),
+        )
+
+    idx.flags.writeable = False  # shared between callers via the cache
+    return idx
+
+
+# Compile _match_rows now (or load it from the numba cache) so the first
+# click does not pay for the JIT
+_match_rows(
+    np.arange(1), VEH_CODES, _code_lut(vehicle_types, ()), CF_CODES, _code_lut(contrib_factors, ()), INJ_FLAGS, 0
+)
+
+# ==========================
+# 4. BUILD APP
 # ==========================
 app = Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
 server = app.server  # for deployment (Railway/gunicorn)
@@ -103,7 +290,7 @@ server = app.server  # for deployment (Railway/gunicorn)
 app.title = "NYC Crashes Dashboard"
 
 # ==========================
-# 4. LAYOUT
+# 5. LAYOUT
 # ==========================
 app.layout = dbc.Container(
     [
@@ -183,6 +370,7 @@ app.layout = dbc.Container(
                         dcc.Input(
                             id="search-input",
                             type="text",
+                            debounce=True,  # sync the value on Enter / blur, not per keystroke
                             placeholder="Type query here...",
                             style={"width": "100%", "padding": "0.5em"},
                         ),
@@ -226,23 +414,55 @@ app.layout = dbc.Container(
             ],
             className="mb-4",
         ),
+
+        # ---- FILTERED AGGREGATES (shared by the callbacks below) ----
+        dcc.Store(id="agg-store"),
     ],
     fluid=True,
 )
 
 # ==========================
-# 5. CALLBACK
+# 6. CALLBACKS
 # ==========================
+def _filtered_view(filters, columns):
+    """
+    Filtered rows of df for the filter list stored in agg-store.
+    Only `columns` are gathered; with no filter set df itself is
+    returned (callers only read from it).
+    """
+    boroughs, years, vehicles, factors, injury = filters
+    if not (boroughs or years or vehicles or factors or injury in INJ_BIT):
+        return df
+    idx = _filter_indices(tuple(boroughs), tuple(years), tuple(vehicles), tuple(factors), injury)
+    return df.iloc[idx, df.columns.get_indexer(columns)]
+
+
+# Columns read by the aggregation and map callbacks
+AGG_COLUMNS = [
+    c
+    for c in [
+        "BOROUGH",
+        "TOTAL_INJURED",
+        "TOTAL_KILLED",
+        "CRASH_YEAR_MONTH",
+        "SEVERITY_LEVEL",
+        "_WD_CODE",
+        "CRASH_HOUR",
+        "LATITUDE",
+        "LONGITUDE",
+    ]
+    if c in df.columns
+]
+MAP_COLUMNS = [c for c in ["LATITUDE", "LONGITUDE", "SEVERITY_INDEX"] if c in df.columns]
+
+
+def _empty_fig():
+    return px.scatter(title="No data for selected filters")
+
+
+# ---- Filtering + aggregation (one pass per click) ----
 @app.callback(
-    [
-        Output("debug-info", "children"),
-        Output("kpi-row", "children"),
-        Output("borough-fig", "figure"),
-        Output("trend-fig", "figure"),
-        Output("severity-fig", "figure"),
-        Output("heatmap-fig", "figure"),
-        Output("map-fig", "figure"),
-    ],
+    Output("agg-store", "data"),
     Input("generate-btn", "n_clicks"),
     [
         State("borough-filter", "value"),
@@ -251,13 +471,11 @@ app.layout = dbc.Container(
         State("factor-filter", "value"),
         State("injury-filter", "value"),
         State("search-input", "value"),
+        State("agg-store", "data"),
     ],
     prevent_initial_call=True,  # Don't run on page load
 )
-def update_report(n_clicks, boroughs, years, vehicles, factors, injury_type, search_text):
-    # Base dataframe
-    dff = df.copy()
-
+def update_report(n_clicks, boroughs, years, vehicles, factors, injury_type, search_text, prev_data=None):
     # ---- Apply search query (if any) ----
     parsed = parse_search_query(search_text) if search_text else {
         "boroughs": None,
@@ -265,33 +483,11 @@ def update_report(n_clicks, boroughs, years, vehicles, factors, injury_type, sea
         "injury_type": None,
     }
 
-    # ========== BOROUGH FILTER ==========
     # Use dropdown if provided, otherwise use search result
     borough_filter = boroughs if boroughs else parsed["boroughs"]
-    if borough_filter:
-        dff = dff[dff["BOROUGH"].isin(borough_filter)]
-
-    # ========== YEAR FILTER ==========
-    # Use dropdown if provided, otherwise use search result
     year_filter = years if years else parsed["years"]
-    if year_filter:
-        dff = dff[dff["CRASH_YEAR"].isin(year_filter)]
-
-    # ========== VEHICLE TYPE FILTER ==========
-    if vehicles:
-        mask_veh = False
-        for c in veh_cols:
-            mask_veh = mask_veh | dff[c].isin(vehicles)
-        dff = dff[mask_veh]
-
-    # ========== CONTRIBUTING FACTOR FILTER ==========
-    if factors:
-        mask_cf = False
-        for c in cf_cols:
-            mask_cf = mask_cf | dff[c].isin(factors)
-        dff = dff[mask_cf]
-
-    # ========== INJURY TYPE FILTER ==========
+
+    # Injury type
     # Priority 1: dropdown (if not "any")
     # Priority 2: search text (if dropdown = "any")
     effective_injury = None
@@ -301,50 +497,117 @@ def update_report(n_clicks, boroughs, years, vehicles, factors, injury_type, sea
     elif parsed["injury_type"]:
         effective_injury = parsed["injury_type"]
 
-    if effective_injury == "pedestrian":
-        dff = dff[dff["HAS_PEDESTRIAN"] == True]
-    elif effective_injury == "cyclist":
-        dff = dff[dff["HAS_CYCLIST"] == True]
-    elif effective_injury == "motorist":
-        dff = dff[dff["HAS_DRIVER"] == True]
+    filters = [
+        list(borough_filter or []),
+        list(year_filter or []),
+        list(vehicles or []),
+        list(factors or []),
+        effective_injury,
+    ]
+    # Nothing filtered → the report precomputed at startup
+    is_default = filters == DEFAULT_FILTERS
+    data = dict(DEFAULT_DATA) if is_default else _aggregate(filters)
 
     # ---- DEBUG INFO ----
-    debug_text = f"Rows: {len(dff)} | Borough: {borough_filter} | Year: {year_filter} | Injury: {effective_injury}"
+    data["debug"] = f"Rows: {data['rows']} | Borough: {borough_filter} | Year: {year_filter} | Injury: {effective_injury}"
+
+    if not data["empty"]:
+        # Figures already on screen (previous report had data) only get
+        # their trace arrays patched instead of being rebuilt
+        data["patch"] = prev_data is not None and not prev_data["empty"]
+        data["patch_map"] = data["patch"] and prev_data["map_points"] > 0 and data["map_points"] > 0
+        data["default"] = is_default
 
-    # If no data after filters → return empty figs
+    return data
+
+
+def _aggregate(filters):
+    """All aggregates for the report, as a JSON-serializable dict for agg-store."""
+    # Filtered view (row positions are cached per filter combination)
+    dff = _filtered_view(filters, AGG_COLUMNS)
+
+    # If no data after filters → figures show an empty placeholder
     if dff.empty:
-        empty_fig = px.scatter(title="No data for selected filters")
+        return {"filters": filters, "rows": 0, "empty": True}
+
+    # ---- Crashes by Borough ----
+    b_counts = _category_counts(dff["BOROUGH"])
+
+    # ---- KPIs ----
+    kpis = {
+        "crashes": len(dff),
+        "injured": int(dff["TOTAL_INJURED"].sum()),
+        "killed": int(dff["TOTAL_KILLED"].sum()),
+        "borough": b_counts.index[0] if not b_counts.empty else "N/A",
+    }
+
+    # ---- Trend (Year-Month) ----
+    tm_counts = None
+    if "CRASH_YEAR_MONTH" in dff.columns:
+        tm_counts = dff["CRASH_YEAR_MONTH"].value_counts().sort_index()
+        # Format labels only for the (few) months, not for every row
+        tm_counts.index = [f"{ym // 100}-{ym % 100:02d}" for ym in tm_counts.index]
+
+    # ---- Severity Distribution ----
+    sev_counts = None
+    if "SEVERITY_LEVEL" in dff.columns:
+        sev_counts = _category_counts(dff["SEVERITY_LEVEL"])
+
+    # ---- Hour vs Weekday (7 x 24 counts) ----
+    # Plain row count (no value column read) on the flat weekday*24 + hour index
+    hw_cell = dff["_WD_CODE"].values.astype(np.intp) * 24 + dff["CRASH_HOUR"].values
+    hw_counts = np.bincount(hw_cell, minlength=7 * 24).reshape(7, 24)
+
+    return {
+        "filters": filters,
+        "rows": len(dff),
+        "empty": False,
+        "map_points": int((dff["LATITUDE"].notna() & dff["LONGITUDE"].notna()).sum()),
+        "kpis": kpis,
+        "borough_counts": b_counts.to_dict(),
+        "trend_counts": tm_counts.to_dict() if tm_counts is not None else None,
+        "severity_counts": sev_counts.to_dict() if sev_counts is not None else None,
+        "hw_counts": hw_counts.tolist(),  # [weekday][hour]
+    }
+
+
+# ---- KPI CARDS ----
+@app.callback(
+    Output("debug-info", "children"),
+    Output("kpi-row", "children"),
+    Input("agg-store", "data"),
+    prevent_initial_call=True,
+)
+def render_kpis(data):
+    if data["empty"]:
         kpi_cards = dbc.Row(
             dbc.Col(
                 dbc.Card(dbc.CardBody([html.H6("No data", className="card-title"), html.P("Adjust filters or search.")])),
                 md=12,
             )
         )
-        return debug_text, kpi_cards, empty_fig, empty_fig, empty_fig, empty_fig, empty_fig
-
-    # ---- KPI CARDS ----
-    total_crashes = len(dff)
-    total_injured = int(dff["TOTAL_INJURED"].sum())
-    total_killed = int(dff["TOTAL_KILLED"].sum())
-    most_common_borough = dff["BOROUGH"].mode().iloc[0] if not dff["BOROUGH"].dropna().empty else "N/A"
+        return data["debug"], kpi_cards
+    if data["default"]:
+        return data["debug"], DEFAULT_KPIS
 
+    kpis = data["kpis"]
     kpi_cards = dbc.Row(
         [
             dbc.Col(
                 dbc.Card(
-                    dbc.CardBody([html.H6("Crashes", className="card-title"), html.H3(f"{total_crashes:,}")])
+                    dbc.CardBody([html.H6("Crashes", className="card-title"), html.H3(f"{kpis['crashes']:,}")])
                 ),
                 md=3,
             ),
             dbc.Col(
                 dbc.Card(
-                    dbc.CardBody([html.H6("Injured", className="card-title"), html.H3(f"{total_injured:,}")])
+                    dbc.CardBody([html.H6("Injured", className="card-title"), html.H3(f"{kpis['injured']:,}")])
                 ),
                 md=3,
             ),
             dbc.Col(
                 dbc.Card(
-                    dbc.CardBody([html.H6("Killed", className="card-title"), html.H3(f"{total_killed:,}")])
+                    dbc.CardBody([html.H6("Killed", className="card-title"), html.H3(f"{kpis['killed']:,}")])
                 ),
                 md=3,
             ),
@@ -353,7 +616,7 @@ def update_report(n_clicks, boroughs, years, vehicles, factors, injury_type, sea
                     dbc.CardBody(
                         [
                             html.H6("Most Dangerous Borough", className="card-title"),
-                            html.H4(most_common_borough),
+                            html.H4(kpis["borough"]),
                         ]
                     )
                 ),
@@ -361,11 +624,26 @@ def update_report(n_clicks, boroughs, years, vehicles, factors, injury_type, sea
             ),
         ]
     )
+    return data["debug"], kpi_cards
+
+
+# ---- FIGURE 1: Crashes by Borough ----
+@app.callback(Output("borough-fig", "figure"), Input("agg-store", "data"), prevent_initial_call=True)
+def render_borough_fig(data):
+    if data["empty"]:
+        return _empty_fig()
 
-    # ---- FIGURE 1: Crashes by Borough ----
-    b_counts = dff["BOROUGH"].value_counts().reset_index()
-    b_counts.columns = ["BOROUGH", "COUNT"]
-    fig_borough = px.bar(
+    if data["patch"]:
+        p = Patch()
+        p["data"][0]["x"] = list(data["borough_counts"])
+        p["data"][0]["y"] = list(data["borough_counts"].values())
+        return p
+
+    if data["default"]:
+        return DEFAULT_FIGS["borough"]
+
+    b_counts = pd.DataFrame(list(data["borough_counts"].items()), columns=["BOROUGH", "COUNT"])
+    return px.bar(
         b_counts,
         x="BOROUGH",
         y="COUNT",
@@ -373,62 +651,101 @@ def update_report(n_clicks, boroughs, years, vehicles, factors, injury_type, sea
         labels={"COUNT": "Number of crashes"},
     )
 
-    # ---- FIGURE 2: Trend (Year-Month) ----
-    if "CRASH_DATETIME" in dff.columns:
-        temp = dff.copy()
-        temp["YEAR_MONTH"] = temp["CRASH_DATETIME"].dt.to_period("M").astype(str)
-        tm_counts = temp["YEAR_MONTH"].value_counts().sort_index().reset_index()
-        tm_counts.columns = ["YEAR_MONTH", "COUNT"]
-        fig_trend = px.line(
-            tm_counts,
-            x="YEAR_MONTH",
-            y="COUNT",
-            title="Monthly Crash Trend",
-            labels={"YEAR_MONTH": "Year-Month", "COUNT": "Crashes"},
-        )
-    else:
-        fig_trend = px.scatter(title="No datetime information")
 
-    # ---- FIGURE 3: Severity Distribution ----
-    if "SEVERITY_LEVEL" in dff.columns:
-        sev_counts = dff["SEVERITY_LEVEL"].value_counts().reset_index()
-        sev_counts.columns = ["SEVERITY_LEVEL", "COUNT"]
-        fig_severity = px.bar(
-            sev_counts,
-            x="SEVERITY_LEVEL",
-            y="COUNT",
-            title="Severity Level Distribution",
-            labels={"COUNT": "Number of crashes"},
-        )
-    else:
-        fig_severity = px.scatter(title="Severity not available")
+# ---- FIGURE 2: Trend (Year-Month) ----
+@app.callback(Output("trend-fig", "figure"), Input("agg-store", "data"), prevent_initial_call=True)
+def render_trend_fig(data):
+    if data["empty"]:
+        return _empty_fig()
+    if data["trend_counts"] is None:
+        return px.scatter(title="No datetime information")
+
+    if data["patch"]:
+        p = Patch()
+        p["data"][0]["x"] = list(data["trend_counts"])
+        p["data"][0]["y"] = list(data["trend_counts"].values())
+        return p
+
+    if data["default"]:
+        return DEFAULT_FIGS["trend"]
+
+    tm_counts = pd.DataFrame(list(data["trend_counts"].items()), columns=["YEAR_MONTH", "COUNT"])
+    return px.line(
+        tm_counts,
+        x="YEAR_MONTH",
+        y="COUNT",
+        title="Monthly Crash Trend",
+        labels={"YEAR_MONTH": "Year-Month", "COUNT": "Crashes"},
+    )
+
 
-    # ---- FIGURE 4: Hour vs Weekday Heatmap ----
-    pivot_hw = dff.pivot_table(
-        index="CRASH_WEEKDAY",
-        columns="CRASH_HOUR",
-        values="COLLISION_ID",
-        aggfunc="count",
-    ).fillna(0)
+# ---- FIGURE 3: Severity Distribution ----
+@app.callback(Output("severity-fig", "figure"), Input("agg-store", "data"), prevent_initial_call=True)
+def render_severity_fig(data):
+    if data["empty"]:
+        return _empty_fig()
+    if data["severity_counts"] is None:
+        return px.scatter(title="Severity not available")
 
-    weekday_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-    pivot_hw = pivot_hw.reindex(weekday_order)
+    if data["patch"]:
+        p = Patch()
+        p["data"][0]["x"] = list(data["severity_counts"])
+        p["data"][0]["y"] = list(data["severity_counts"].values())
+        return p
 
-    fig_heat = px.imshow(
-        pivot_hw,
+    if data["default"]:
+        return DEFAULT_FIGS["severity"]
+
+    sev_counts = pd.DataFrame(list(data["severity_counts"].items()), columns=["SEVERITY_LEVEL", "COUNT"])
+    return px.bar(
+        sev_counts,
+        x="SEVERITY_LEVEL",
+        y="COUNT",
+        title="Severity Level Distribution",
+        labels={"COUNT": "Number of crashes"},
+    )
+
+
+# ---- FIGURE 4: Hour vs Weekday Heatmap ----
+@app.callback(Output("heatmap-fig", "figure"), Input("agg-store", "data"), prevent_initial_call=True)
+def render_heatmap_fig(data):
+    if data["empty"]:
+        return _empty_fig()
+
+    if data["patch"]:
+        p = Patch()
+        p["data"][0]["z"] = data["hw_counts"]
+        return p
+
+    if data["default"]:
+        return DEFAULT_FIGS["heatmap"]
+
+    return px.imshow(
+        data["hw_counts"],
+        x=list(range(24)),
+        y=WEEKDAY_ORDER,
         aspect="auto",
-        labels={"color": "Crash count"},
+        labels={"x": "CRASH_HOUR", "y": "CRASH_WEEKDAY", "color": "Crash count"},
         title="Crashes by Hour and Weekday",
     )
 
-    # ---- FIGURE 5: Map (Density) ----
+
+# ---- FIGURE 5: Map (Density) ----
+@app.callback(Output("map-fig", "figure"), Input("agg-store", "data"), prevent_initial_call=True)
+def render_map_fig(data):
+    if data["empty"]:
+        return _empty_fig()
+
+    if data["default"] and not data["patch_map"]:
+        return DEFAULT_FIGS["map"]
+
+    # Points are not worth shipping through the store: the filtered
+    # rows come straight from the _filter_indices cache instead.
+    dff = _filtered_view(data["filters"], MAP_COLUMNS)
     dff_map = dff.dropna(subset=["LATITUDE", "LONGITUDE"])
-    # Sample if too many points (performance optimization)
-    if len(dff_map) > 8000:
-        dff_map = dff_map.sample(n=8000, random_state=42)
 
-    if dff_map.empty or "SEVERITY_INDEX" not in dff_map.columns:
-        fig_map = px.scatter_mapbox(
+    if dff_map.empty:
+        return px.scatter_mapbox(
             dff_map,
             lat="LATITUDE",
             lon="LONGITUDE",
@@ -437,25 +754,62 @@ def update_report(n_clicks, boroughs, years, vehicles, factors, injury_type, sea
             title="Crash Locations",
             mapbox_style="open-street-map",
         )
-    else:
-        fig_map = px.density_mapbox(
-            dff_map,
-            lat="LATITUDE",
-            lon="LONGITUDE",
-            z="SEVERITY_INDEX",
-            radius=10,
-            center=dict(lat=40.71, lon=-74.00),
-            zoom=9,
-            mapbox_style="open-street-map",
-            height=500,
-            title="Crash Density (weighted by severity)",
-        )
 
-    return debug_text, kpi_cards, fig_borough, fig_trend, fig_severity, fig_heat, fig_map
+    # Bin all crashes on the grid (weighted by severity) and plot only
+    # the non-empty cells, instead of sampling individual points
+    weighted = "SEVERITY_INDEX" in dff_map.columns
+    H, _, _ = np.histogram2d(
+        dff_map["LATITUDE"].values,
+        dff_map["LONGITUDE"].values,
+        bins=(MAP_LAT_EDGES, MAP_LON_EDGES),
+        weights=dff_map["SEVERITY_INDEX"].values if weighted else None,
+    )
+    i, j = np.nonzero(H)
+    grid = pd.DataFrame({"LATITUDE": MAP_LAT_CENTERS[i], "LONGITUDE": MAP_LON_CENTERS[j], "WEIGHT": H[i, j]})
+
+    if data["patch_map"]:
+        p = Patch()
+        p["data"][0]["lat"] = grid["LATITUDE"].values
+        p["data"][0]["lon"] = grid["LONGITUDE"].values
+        p["data"][0]["z"] = grid["WEIGHT"].values
+        return p
+
+    fig_map = px.density_mapbox(
+        grid,
+        lat="LATITUDE",
+        lon="LONGITUDE",
+        z="WEIGHT",
+        radius=10,
+        center=dict(lat=40.71, lon=-74.00),
+        zoom=9,
+        mapbox_style="open-street-map",
+        height=500,
+        title="Crash Density (weighted by severity)" if weighted else "Crash Density",
+        labels={"WEIGHT": "Severity" if weighted else "Crashes"},
+    )
+
+    return fig_map
+
+
+# ---- DEFAULT REPORT (no filters) ----
+# The report over all rows is the most expensive one, so its aggregates,
+# KPI cards and figures are built once at startup and served as is.
+DEFAULT_FILTERS = [[], [], [], [], None]
+DEFAULT_DATA = _aggregate(DEFAULT_FILTERS)
+
+_default_data = {**DEFAULT_DATA, "debug": "", "patch": False, "patch_map": False, "default": False}
+DEFAULT_KPIS = render_kpis(_default_data)[1]
+DEFAULT_FIGS = {
+    "borough": render_borough_fig(_default_data).to_dict(),
+    "trend": render_trend_fig(_default_data).to_dict(),
+    "severity": render_severity_fig(_default_data).to_dict(),
+    "heatmap": render_heatmap_fig(_default_data).to_dict(),
+    "map": render_map_fig(_default_data).to_dict(),
+}
 
 
 # ==========================
-# 6. RUN (Railway / local)
+# 7. RUN (Railway / local)
 # ==========================
 if __name__ == "__main__":
     app.run_server(debug=False)
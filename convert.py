@@ -0,0 +1,66 @@
+"""
+One-time conversion of the cleaned CSV into an Arrow IPC file.
+
+The dashboard memory-maps the Arrow file on startup: it is column-oriented,
+keeps the categorical / datetime dtypes and needs no text parsing, and the
+mapped pages are shared by all gunicorn workers through the OS page cache.
+
+Run again whenever df_full_features.csv changes:
+    python convert.py
+"""
+import pandas as pd
+import pyarrow as pa
+
+CSV_PATH = "df_full_features.csv"
+ARROW_PATH = "df_full_features.arrow"
+
+# Only the columns the dashboard uses
+USECOLS = [
+    "CRASH_DATETIME",
+    "CRASH_YEAR",
+    "CRASH_HOUR",
+    "CRASH_WEEKDAY",
+    "BOROUGH",
+    "LATITUDE",
+    "LONGITUDE",
+    *[f"CONTRIBUTING FACTOR VEHICLE {i}" for i in range(1, 6)],
+    *[f"VEHICLE TYPE CODE {i}" for i in range(1, 6)],
+    "TOTAL_INJURED",
+    "TOTAL_KILLED",
+    "SEVERITY_INDEX",
+    "SEVERITY_LEVEL",
+    "HAS_PEDESTRIAN",
+    "HAS_CYCLIST",
+    "HAS_DRIVER",
+]
+
+# Low-cardinality string columns are loaded as categoricals,
+# numbers with the smallest dtype that fits them
+DTYPES = {
+    "BOROUGH": "category",
+    "CRASH_WEEKDAY": "category",
+    "SEVERITY_LEVEL": "category",
+    **{f"VEHICLE TYPE CODE {i}": "category" for i in range(1, 6)},
+    **{f"CONTRIBUTING FACTOR VEHICLE {i}": "category" for i in range(1, 6)},
+    "CRASH_YEAR": "int16",
+    "CRASH_HOUR": "int8",
+    "TOTAL_INJURED": "int16",
+    "TOTAL_KILLED": "int16",
+    "SEVERITY_INDEX": "int16",
+    "LATITUDE": "float32",  # plenty for map binning
+    "LONGITUDE": "float32",
+}
+
+
+def read_csv(path: str = CSV_PATH) -> pd.DataFrame:
+    """Read the cleaned CSV with the columns and dtypes used by the dashboard."""
+    return pd.read_csv(path, usecols=USECOLS, dtype=DTYPES, parse_dates=["CRASH_DATETIME"])
+
+
+if __name__ == "__main__":
+    df = read_csv()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # Uncompressed, so the file can be memory-mapped as is
+    with pa.OSFile(ARROW_PATH, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    print(f"Wrote {ARROW_PATH} ({len(df):,} rows)")